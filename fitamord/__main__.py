@@ -7,7 +7,11 @@
 # TODO convert to script (running this module as main prevents debugging with `-m pdb`)
 
 
+import argparse
 import collections
+import contextlib
+import gzip
+import io
 import itertools as itools
 import math
 import sys
@@ -20,6 +24,7 @@ import psutil
 from . import __version__
 from . import config
 from . import database
+from . import datatypes
 from . import delimited
 from . import features
 from . import file
@@ -42,24 +47,47 @@ _ex_len = 4
 _time_start_idx = 1
 _time_stop_idx = 2
 _label_idx = 3
+# Number of columns to load for each data treatment that has a fixed
+# record length
+_treats2lens = {
+    'events': _ev_len,
+    'examples': _ex_len,
+}
+# Columns to index for each data treatment so that records can be
+# retrieved in order by patient ID (and time) without sorting
+_treats2key_idxs = {
+    'facts': (_pt_id_idx,),
+    'events': (_pt_id_idx, _time_idx),
+    'examples': (_pt_id_idx, _time_start_idx),
+}
 
 
 # Data treatment # TODO should this go elsewhere?
 
 
 def make_recognizer(matching_values): # TODO move to general?
-    matches = set()
+    str_matches = set()
+    other_matches = set()
     for val in matching_values:
         # Canonicalize string values
         if isinstance(val, str):
-            matches.add(val.strip().lower())
+            str_matches.add(val.strip().lower())
         # Match other values as is
         else:
-            matches.add(val)
-    def recognizer(obj):
-        if isinstance(obj, str):
-            return obj.strip().lower() in matches
-        return obj in matches
+            other_matches.add(val)
+    str_matches = frozenset(str_matches)
+    other_matches = frozenset(other_matches)
+    # Choose the recognizer once here rather than on every call.  If
+    # all the matching values are strings, only strings can match.
+    if not other_matches:
+        def recognizer(obj):
+            return (isinstance(obj, str)
+                    and obj.strip().lower() in str_matches)
+    else:
+        def recognizer(obj):
+            if isinstance(obj, str):
+                return obj.strip().lower() in str_matches
+            return obj in other_matches
     return recognizer
 
 
@@ -90,10 +118,78 @@ def is_valid_example(record):
             is_ordered)
 
 
-def make_discard_logger(logger, message):
-    def discard_logger(record):
-        logger.info(message, record)
-    return discard_logger
+def make_is_valid_example(header):
+    """Return a validator for example records with the given header.
+
+    If the "from" and "upto" columns have the same definite data type,
+    then their values are always comparable and the validator need not
+    guard their comparison.
+
+    """
+    start_type = header.type_at(_time_start_idx)
+    stop_type = header.type_at(_time_stop_idx)
+    if (start_type != stop_type
+            or not isinstance(start_type, datatypes.TextValueType)
+            or start_type == datatypes.Atom):
+        return is_valid_example
+    def is_valid_example_of_type(record):
+        return (record[0] is not None and
+                record[3] is not None and
+                (record[1] is None or
+                 record[2] is None or
+                 record[1] <= record[2]))
+    return is_valid_example_of_type
+
+
+def make_validator(treatment, header):
+    """Return a validator for records with the given data treatment and
+    header, or `None` if records with that treatment are not validated."""
+    if treatment == 'facts':
+        return is_valid_fact
+    elif treatment == 'events':
+        return is_valid_event
+    elif treatment == 'examples':
+        return make_is_valid_example(header)
+    return None
+
+
+class DiscardLogger:
+    """Counts discarded records and logs them in summary.
+
+    Keeps the first few discarded records as examples and logs only the
+    running count every so often so that formatting and logging do not
+    dominate the processing of dirty data.
+    """
+
+    __slots__ = ('_log', '_reason', '_n_examples', '_log_every',
+                 'n_discarded', 'examples')
+
+    def __init__(self, logger, reason, n_examples=10, log_every=10000,
+                 level='info'):
+        self._log = getattr(logger, level)
+        self._reason = reason
+        self._n_examples = n_examples
+        self._log_every = log_every
+        self.n_discarded = 0
+        self.examples = []
+
+    def __call__(self, record):
+        self.n_discarded += 1
+        if len(self.examples) < self._n_examples:
+            self.examples.append(record)
+        if self.n_discarded % self._log_every == 0:
+            self._log('Discarding: {}: {} so far',
+                      self._reason, self.n_discarded)
+
+    def log_summary(self):
+        if self.n_discarded == 0:
+            return
+        self._log('Discarded: {}: {} records, for example: {}',
+                  self._reason, self.n_discarded, self.examples)
+
+
+def make_discard_logger(logger, reason):
+    return DiscardLogger(logger, reason)
 
 
 def make_record_filter(filter, discard_handler):
@@ -110,31 +206,40 @@ def make_record_filter(filter, discard_handler):
 
 
 def interpret_facts(record_collection, fact_table_names, headers):
-    facts = []
     for table_name in fact_table_names:
+        # Make the (table, field) keys once per table, not per record.
+        # Intern the names so that they are shared with the feature keys.
+        table_name = sys.intern(table_name)
+        keys = tuple((table_name, sys.intern(field_name))
+                     for field_name in headers[table_name].names())
         for record in record_collection[table_name]:
-            for field_idx, field_name in enumerate(
-                    headers[table_name].names()):
-                facts.append(((table_name, field_name),
-                              record[field_idx]))
-    return facts
+            for field_idx, key in enumerate(keys):
+                yield (key, record[field_idx])
 
 
 def interpret_events(record_collection, event_table_names, headers):
-    events = []
     for table_name in event_table_names:
-        field_name = headers[table_name].name_at(2)
-        for record in record_collection[table_name]:
-            if len(record) == 3:
-                _, when, what = record
-                value = None
-            elif len(record) == 4:
-                _, when, what, value = record
-            else:
-                raise ValueError('Uninterpretable event record: {!r}'
-                                 .format(record))
-            events.append((when, (table_name, field_name, what), value))
-    return events
+        header = headers[table_name]
+        table_name = sys.intern(table_name)
+        field_name = sys.intern(header.name_at(2))
+        records = record_collection[table_name]
+        # All the records in a table have the same length, so choose
+        # how to unpack them once per table.  Event types repeat a lot,
+        # so share a single copy of each, which also makes comparing
+        # them with feature keys cheap.
+        if len(header) == 3:
+            for (_, when, what) in records:
+                if type(what) is str:
+                    what = sys.intern(what)
+                yield (when, (table_name, field_name, what), None)
+        elif len(header) == 4:
+            for (_, when, what, value) in records:
+                if type(what) is str:
+                    what = sys.intern(what)
+                yield (when, (table_name, field_name, what), value)
+        else:
+            raise ValueError('Uninterpretable event records: {!r}'
+                             .format(header))
 
 
 def interpret_examples(record_collection, example_table_names):
@@ -148,11 +253,53 @@ def interpret_examples(record_collection, example_table_names):
 
 
 def print_as_svmlight(label, feature_vector_dict, file=sys.stdout):
-    print(label, end='', file=file)
-    for idx in sorted(feature_vector_dict.keys()):
-        print(' ', idx, ':', feature_vector_dict[idx],
-              sep='', end='', file=file)
-    print(file=file)
+    # Build the whole line and write it at once
+    fields = [str(label)]
+    fields.extend('{}:{}'.format(idx, value) for (idx, value)
+                  in sorted(feature_vector_dict.items()))
+    file.write(' '.join(fields) + '\n')
+
+
+@contextlib.contextmanager
+def open_output(filename=None):
+    """Context manager that opens the given file, or standard output if
+    `None`, for writing text through a large buffer so that writes are
+    few and large.
+
+    Files whose names end with ".gz" are compressed with gzip at a low
+    compression level, which is fast.  Standard output is flushed
+    before and after use but is not closed.  If standard output has no
+    underlying binary buffer (e.g. it has been replaced by a `StringIO`),
+    it is used as is.
+
+    """
+    if filename is None:
+        stdout = sys.stdout
+        # Write anything already written to standard output first
+        stdout.flush()
+        stdout_buffer = getattr(stdout, 'buffer', None)
+        if stdout_buffer is None:
+            yield stdout
+            stdout.flush()
+            return
+        output = io.TextIOWrapper(
+            io.BufferedWriter(stdout_buffer, buffer_size=(2 ** 20)),
+            encoding=stdout.encoding)
+        try:
+            yield output
+        finally:
+            # Flush and then detach so that standard output stays open
+            output.flush()
+            output.detach().detach()
+            stdout_buffer.flush()
+    elif filename.endswith('.gz'):
+        with io.TextIOWrapper(io.BufferedWriter(
+                gzip.GzipFile(filename, 'wb', compresslevel=1),
+                buffer_size=(2 ** 20))) as output:
+            yield output
+    else:
+        with io.open(filename, 'wt', buffering=(2 ** 20)) as output:
+            yield output
 
 
 # Command line API
@@ -165,17 +312,207 @@ def extension_combinations(extensions, *extension_collections):
         yield '.'.join(str(e) for e in tup if e is not None)
 
 
+# Queries on the table that tracks loading.  Format with the name of the
+# tracking table.
+_load_dlms_select_sql = (
+    'select size, mtime, header, loaded from {} where name = ?')
+_load_dlms_insert_sql = 'insert into {} (name) values (?)'
+_load_dlms_update_sql = (
+    'update {} set size = ?, mtime = ?, header = ?, loaded = ? '
+    'where name = ?')
+_load_dlms_set_loaded_sql = 'update {} set loaded = ? where name = ?'
+
+
+def load_table(
+        db, table_cfg, base_directory, is_missing, discard_loggers,
+        load_dlms_name):
+    """Load the tabular file described by the given table configuration
+    into the DB unless it has already been loaded.
+
+    Returns the loaded table or `None` if the table was not loaded,
+    either due to an error or because it was already loaded.  Tracks
+    loading in the table named `load_dlms_name`.  Records are
+    validated according to the table's data treatment, if any, as they
+    are loaded, and invalid records are passed to the discard logger for
+    that treatment.
+
+    """
+    logger = logging.getLogger('main')
+    reader_logger = logging.getLogger(
+        general.fq_typename(delimited.Reader))
+    logger.info("Loading '{}'", table_cfg.name)
+    # Check if file exists
+    table_file = base_directory.join(table_cfg.filename)
+    if not table_file.is_readable_file():
+        logger.error(
+            'Loading failed: Not a readable file: {}', table_file)
+        return
+    # Set up for reading
+    tabular_file = delimited.File(
+        path=table_file,
+        format=table_cfg.format,
+        name=table_cfg.name,
+        header=table_cfg.header,
+        )
+    # Detect format and header if needed # TODO replace with reusable per-file config detection
+    if tabular_file.format is None or tabular_file.header is None:
+        tabular_file.init_from_file()
+        if (tabular_file.format is None
+                or tabular_file.header is None):
+            logger.error(
+                'Loading failed: '
+                'Format or header detection failed: {}',
+                table_file)
+            return
+        # Remember what was detected
+        table_cfg.set_detected(tabular_file.format, tabular_file.header)
+    # Project header to create a header for the loaded data.  The
+    # header in the config applies to the tabular file, not
+    # necessarily to the data loaded in the DB, which is projected
+    # through the "use:" config attribute and then truncated to
+    # the length required by the data treatment.  Compose these
+    # into a single projection.
+    all_columns = list(range(len(tabular_file.header)))
+    columns = (list(table_cfg.use_columns)
+               if table_cfg.use_columns
+               else all_columns)
+    n_columns = _treats2lens.get(table_cfg.treat_as)
+    if n_columns is not None:
+        del columns[n_columns:]
+    data_header = tabular_file.header
+    if columns != all_columns:
+        data_header = data_header.project(*columns)
+    # The loaded data depends on the data treatment (through
+    # validation) as well as on the header
+    load_signature = '{} as {}'.format(
+        data_header, table_cfg.treat_as)
+    # Check if table has already been loaded
+    fingerprint = file.Fingerprint.from_path(tabular_file.path.path)
+    logger.info("File '{}' has fingerprint: {}", tabular_file.path, fingerprint)
+    #rows = load_dlms.select(lambda r: r['name'] == table_cfg.name) # TODO implement predicates as expressions or as functions ("row predicates")
+    rows = list(db.execute_query(
+        _load_dlms_select_sql.format(load_dlms_name),
+        (tabular_file.name,)))
+    logger.info("DB has loaded '{}': {}", tabular_file.name, rows)
+    if len(rows) > 1:
+        raise Exception('Multiple tables found with name: {}'
+                        .format(tabular_file.name))
+    elif len(rows) == 1:
+        row = rows[0]
+        if (row[0] == fingerprint.size and
+                row[1] == str(fingerprint.mtime_ns) and
+                row[2] == load_signature and
+                row[3] == 1):
+            # Patch in header due to SQLite implementation not setting header (FIXME)
+            table = db.table(table_cfg.name)
+            table._header = data_header
+            # Skip this table as it has already been loaded
+            logger.info(
+                "Skipping '{}': Already loaded", table_cfg.name)
+            return
+    # Track and load the table in a single transaction so that it is
+    # committed once and a failed load leaves nothing behind
+    with db.transaction():
+        if not rows:
+            # Create entry to track loading of this table
+            db.execute_query(
+                _load_dlms_insert_sql.format(load_dlms_name),
+                (tabular_file.name,))
+        # Update row for this table
+        db.execute_query(
+            _load_dlms_update_sql.format(load_dlms_name),
+            (fingerprint.size, str(fingerprint.mtime_ns),
+             load_signature, 0, tabular_file.name))
+        # Read delimited file counting and sampling errors.  Project as
+        # part of reading (this is pushed down below field parsing).
+        error_logger = DiscardLogger(
+            reader_logger, "Bad record in '{}'".format(table_file),
+            level='error')
+        reader = tabular_file.reader(
+            is_missing,
+            error_logger,
+            columns=(columns if columns != all_columns else None))
+        # Retain only valid records, discard others
+        validator = make_validator(table_cfg.treat_as, reader.header)
+        if validator is not None:
+            reader = reader.select(make_record_filter(
+                validator, discard_loggers[table_cfg.treat_as]))
+        # Bulk load records from file into table
+        table = db.make_table(reader.name, reader.header)
+        n_loaded = table.add_all(reader)
+        error_logger.log_summary()
+        # Record that the table successfully loaded
+        db.execute_query(
+            _load_dlms_set_loaded_sql.format(load_dlms_name),
+            (1, tabular_file.name))
+    logger.info(
+        "Loaded {} records from '{}' into '{}'",
+        n_loaded, table_file.path, table.name)
+    logger.info("Done loading '{}'", table_cfg.name)
+    return table
+
+
+def index_table(db, table_cfg):
+    """Index the configured table by the key columns of its data
+    treatment unless it is already indexed.
+
+    Returns whether an index was created.
+
+    """
+    key_idxs = _treats2key_idxs.get(table_cfg.treat_as)
+    if key_idxs is None or not db.exists(table_cfg.name):
+        return False
+    index_name = '{}_key_idx'.format(table_cfg.name)
+    if db.exists(index_name):
+        return False
+    # Headers are not parsed from the DB, so only tables whose headers
+    # were set while loading can be indexed
+    table = db.table(table_cfg.name)
+    if table.header is None:
+        return False
+    db.create_index(
+        index_name,
+        table.name,
+        [table.header.name_at(idx) for idx in key_idxs])
+    return True
+
+
+def write_detection_key(key_file, directory, filenames):
+    """Write the detection key of the given files (see
+    `config.detection_key`) to the given key file."""
+    key = config.detection_key(directory, filenames)
+    with key_file.open('wt') as file:
+        print(key, file=file)
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        prog='fitamord', description=__doc__)
+    parser.add_argument(
+        'directory', nargs='?', default='.',
+        help='Directory containing the data and configuration '
+        '(default: current directory)')
+    parser.add_argument(
+        '--output', '-o', metavar='FILE',
+        help='Write the feature vectors to the given file instead of '
+        'standard output.  Compresses with gzip if the filename ends '
+        'with ".gz".')
+    return parser.parse_args(args)
+
+
 def main(args=None): # TODO split into outer main that catches and logs exceptions and inner main that raises exceptions
     # Default args to sys.argv
     if args is None:
         args = sys.argv[1:]
-    base_directory = files.File(args[0] if args else '.')
+    args = parse_args(args)
+    base_directory = files.File(args.directory)
 
     # Definitions which should be configurable
-    tabular_extensions = {'csv'}
-    compression_extensions = {'gz', 'bz2', 'xz'}
+    tabular_extensions = frozenset(('csv',))
+    compression_extensions = frozenset(('gz', 'bz2', 'xz'))
     config_filename = 'fitamord_config.yaml'
     generated_config_filename = 'fitamord_config.generated.yaml'
+    generated_key_filename = 'fitamord_config.generated.key'
     generated_features_filename = 'features.generated.csv'
     db_filename = 'fitamord.sqlite'
 
@@ -192,6 +529,9 @@ def main(args=None): # TODO split into outer main that catches and logs exceptio
 
     # Read config # TODO process command line, create environment
     config_file = base_directory.join(config_filename)
+    gen_config_file = base_directory.join(generated_config_filename)
+    gen_key_file = base_directory.join(generated_key_filename)
+    config_obj = None
     if config_file.is_readable_file():
         # Load configuration
         logger.info('Loading configuration from: {}', config_file)
@@ -199,6 +539,12 @@ def main(args=None): # TODO split into outer main that catches and logs exceptio
         if not config_obj.tables:
             logger.error('No tables defined in: {}', config_file)
             return
+        # The generated configuration depends on the configuration and
+        # on the tabular files (through detecting formats and headers)
+        input_filenames = [config_filename]
+        input_filenames.extend(
+            table_cfg.filename for table_cfg in config_obj.tables
+            if base_directory.join(table_cfg.filename).is_readable_file())
     else:
         # Guess configuration
         ext_combs = list(extension_combinations(
@@ -208,15 +554,57 @@ def main(args=None): # TODO split into outer main that catches and logs exceptio
             'Detecting configuration from files matching: {}/*{{{}}}',
             base_directory,
             ','.join(ext_combs))
-        config_obj = config.detect(base_directory, ext_combs)
+        input_filenames = config.find_tabular_files(
+            base_directory, tabular_extensions, compression_extensions)
+
+    # Reuse the detected formats and headers in the previously
+    # generated configuration if neither it nor any of its inputs have
+    # changed since it was generated.  Including the generated
+    # configuration means that any edits to it are not silently reused.
+    gen_key_filenames = input_filenames + [generated_config_filename]
+    config_reused = False
+    if (gen_config_file.is_readable_file()
+            and gen_key_file.is_readable_file()):
+        with gen_key_file.open('rt') as key_file:
+            previous_key = key_file.read().strip()
+        config_reused = (previous_key == config.detection_key(
+            base_directory, gen_key_filenames))
+    if config_reused:
+        logger.info('Reusing detected formats and headers from: {}',
+                    gen_config_file)
+        gen_config_obj = config.load(gen_config_file)
+        if config_obj is None:
+            config_obj = gen_config_obj
+        else:
+            # Keep the given configuration so that it is the one
+            # referred to in any errors
+            gen_tables = {table_cfg.name: table_cfg
+                          for table_cfg in gen_config_obj.tables}
+            for table_cfg in config_obj.tables:
+                gen_table_cfg = gen_tables.get(table_cfg.name)
+                if gen_table_cfg is not None:
+                    table_cfg.set_detected(
+                        gen_table_cfg.format, gen_table_cfg.header)
+    elif config_obj is None:
+        config_obj = config.detect(
+            base_directory,
+            tabular_extensions,
+            compression_extensions,
+            input_filenames,
+            )
         if not config_obj.tables:
             logger.error('No tables detected in: {}', base_directory)
             return
 
-    # Write config
-    gen_config_file = base_directory.join(generated_config_filename)
-    logger.info('Writing configuration to: {}', gen_config_file)
-    config.save(config_obj, gen_config_file, insert_defaults=True)
+    # Write config unless it was just read from the same file
+    if not config_reused:
+        logger.info('Writing configuration to: {}', gen_config_file)
+        if not config.save(
+                config_obj, gen_config_file, insert_defaults=True):
+            logger.info('Configuration unchanged: {}', gen_config_file)
+        # Record what the written configuration was generated from so
+        # that detection can be skipped next time
+        write_detection_key(gen_key_file, base_directory, gen_key_filenames)
 
     # Validate data treatments.  This has to be done after writing the
     # configuration to make sure there is a configuration to refer to in
@@ -253,6 +641,10 @@ def main(args=None): # TODO split into outer main that catches and logs exceptio
         db_file.path,
         db_cache_size=db_cache_size,
         db_mmap_size=db_mmap_size,
+        # Write-ahead logging makes committing cheap enough that full
+        # synchronization is unnecessary
+        journal_mode='wal',
+        synchronous='normal',
     ) # TODO separate establishing connection from construction to enable context manager
 
     # Create, if needed, a table for tracking loading of tables from
@@ -277,95 +669,54 @@ def main(args=None): # TODO split into outer main that catches and logs exceptio
         # Attach header because parsing header from SQL is not implemented (TODO)
         load_dlms._header = load_dlms_hdr
 
-    # Load tabular files into DB
-    reader_logger = logging.getLogger(
-        general.fq_typename(delimited.Reader))
-    for table_cfg in config_obj.tables:
-        logger.info("Loading '{}'", table_cfg.name)
-        # Check if file exists
-        table_file = base_directory.join(table_cfg.filename)
-        if not table_file.is_readable_file():
-            logger.error(
-                'Loading failed: Not a readable file: {}', table_file)
-            continue
-        # Set up for reading
-        tabular_file = delimited.File(
-            path=table_file,
-            format=table_cfg.format,
-            name=table_cfg.name,
-            header=table_cfg.header,
-            )
-        # Detect format and header if needed # TODO replace with reusable per-file config detection
-        if tabular_file.format is None or tabular_file.header is None:
-            tabular_file.init_from_file()
-            if (tabular_file.format is None
-                    or tabular_file.header is None):
-                logger.error(
-                    'Loading failed: '
-                    'Format or header detection failed: {}',
-                    table_file)
-                continue
-        # Project header to create a header for the loaded data.  The
-        # header in the config applies to the tabular file, not
-        # necessarily to the data loaded in the DB, which is projected
-        # through the "use:" config attribute.
-        data_header = tabular_file.header
-        if table_cfg.use_columns:
-            data_header = data_header.project(*table_cfg.use_columns)
-        # Check if table has already been loaded
-        fingerprint = file.Fingerprint.from_path(tabular_file.path.path)
-        logger.info("File '{}' has fingerprint: {}", tabular_file.path, fingerprint)
-        #rows = load_dlms.select(lambda r: r['name'] == table_cfg.name) # TODO implement predicates as expressions or as functions ("row predicates")
-        rows = list(db.execute_query(
-            'select size, mtime, header, loaded '
-            'from {} where name = ?'.format(load_dlms_name),
-            (tabular_file.name,)))
-        logger.info("DB has loaded '{}': {}", tabular_file.name, rows)
-        if len(rows) > 1:
-            raise Exception('Multiple tables found with name: {}'
-                            .format(tabular_file.name))
-        elif len(rows) == 1:
-            row = rows[0]
-            if (row[0] == fingerprint.size and
-                    row[1] == str(fingerprint.mtime_ns) and
-                    row[2] == str(data_header) and
-                    row[3] == 1):
-                # Patch in header due to SQLite implementation not setting header (FIXME)
-                table = db.table(table_cfg.name)
-                table._header = data_header
-                # Skip this table as it has already been loaded
-                logger.info("Skipping '{}': Already loaded", table_cfg.name)
-                continue
-        else:
-            # Create entry to track loading of this table
-            crsr = db.execute_query('insert into {} (name) values (?)'.format(load_dlms_name), (tabular_file.name,))
-            crsr.connection.commit()
-        # Update row for this table
-        crsr = db.execute_query('update {} set size = ?, mtime = ?, header = ?, loaded = ? where name = ?'.format(load_dlms_name), (fingerprint.size, str(fingerprint.mtime_ns), str(data_header), 0, tabular_file.name))
-        crsr.connection.commit()
-        # Read delimited file logging all errors
-        reader = tabular_file.reader(
-            is_missing,
-            lambda e: reader_logger.error("'{}': {}", table_file, e))
-        # Project (this is pushed down below field parsing)
-        if table_cfg.use_columns:
-            reader = reader.project(*table_cfg.use_columns)
-        if (table_cfg.treat_as == 'events'
-                and len(reader.header) > _ev_len):
-            reader = reader.project(*range(_ev_len))
-        elif (table_cfg.treat_as == 'examples'
-              and len(reader.header) > _ex_len):
-            reader = reader.project(*range(_ex_len))
-        # Bulk load records from file into table
-        table = db.make_table(reader.name, reader.header)
-        table.add_all(reader)
-        # Record that the table successfully loaded
-        crsr = db.execute_query('update {} set loaded = ? where name = ?'.format(load_dlms_name), (1, tabular_file.name))
-        crsr.connection.commit()
-        logger.info(
-            "Loaded {} records from '{}' into '{}'",
-            table.count_rows(), table_file.path, table.name)
-        logger.info("Done loading '{}'", table_cfg.name)
+    # Logging discarders for record filters.  Records are validated as
+    # they are loaded so that invalid records never enter the DB. # TODO upgrade to add line numbers (from original file) to error messages
+    validation_logger = logging.getLogger('clean data')
+    discard_loggers = {
+        'facts': make_discard_logger(
+            validation_logger, 'Not a valid fact'),
+        'events': make_discard_logger(
+            validation_logger, 'Not a valid event'),
+        'examples': make_discard_logger(
+            validation_logger, 'Not a valid example'),
+        }
+
+    # Load tabular files into DB with the connection tuned for bulk
+    # loading.  Note which tables will have their formats or headers
+    # detected.
+    undetected_tables = [
+        table_cfg for table_cfg in config_obj.tables
+        if table_cfg.format is None or table_cfg.header is None]
+    with db.bulk_load():
+        n_loaded = 0
+        for table_cfg in config_obj.tables:
+            table = load_table(db, table_cfg, base_directory, is_missing,
+                               discard_loggers, load_dlms_name)
+            if table is not None:
+                n_loaded += 1
+        # Index tables after they are loaded so that each index is built
+        # once rather than maintained with every insert.  This includes
+        # tables that were already loaded but not indexed.
+        n_indexed = 0
+        for table_cfg in config_obj.tables:
+            if index_table(db, table_cfg):
+                n_indexed += 1
+        # Update the statistics the query planner uses to choose indices
+        if n_loaded > 0 or n_indexed > 0:
+            db.analyze()
+
+    # Save any formats and headers detected while loading so that they
+    # need not be detected again
+    if (any(table_cfg.format is not None
+             and table_cfg.header is not None
+             for table_cfg in undetected_tables)
+            and config.save(
+                config_obj, gen_config_file, insert_defaults=True)):
+        logger.info('Wrote detected formats and headers to: {}',
+                    gen_config_file)
+        write_detection_key(gen_key_file, base_directory, gen_key_filenames)
+    for discard_logger in discard_loggers.values():
+        discard_logger.log_summary()
 
     # Above: ahdb.  Below: fitamord.  (Except validation pushed up
     # before data loading as much as possible.)
@@ -399,16 +750,13 @@ def main(args=None): # TODO split into outer main that catches and logs exceptio
     # TODO convert config to interpret "event(patient_id, age, dx_code)" and the like
 
     # Look up tables and organize by table data treatment
-    db_tables = {}
+    tables = {}
     treats2tables = collections.defaultdict(list)
-    tables2treats = {}
     for table_cfg in config_obj.tables:
         table = db.table(table_cfg.name)
-        db_tables[table.name] = table
+        tables[table.name] = table
         treats2tables[table_cfg.treat_as].append(table.name)
-        tables2treats[table.name] = table_cfg.treat_as
-    tables = dict(db_tables)
-    # Sort table names
+    # Sort table names once here so that they need not be sorted again
     for table_names in treats2tables.values():
         table_names.sort()
 
@@ -425,8 +773,8 @@ def main(args=None): # TODO split into outer main that catches and logs exceptio
             feats = features.encode_categorical_features(feats, tables)
     # Otherwise detect features
     else:
-        fact_tables_names = sorted(treats2tables['facts'])
-        event_tables_names = sorted(treats2tables['events'])
+        fact_tables_names = treats2tables['facts']
+        event_tables_names = treats2tables['events']
         logger.info(
             'No features table specified: '
             'Detecting features in tables: {}',
@@ -441,7 +789,8 @@ def main(args=None): # TODO split into outer main that catches and logs exceptio
             features_are_counts=config_obj.features_are_counts,
             )
         if not feats:
-            logger.error('No features detected in: {}', feats_tables_names)
+            logger.error('No features detected in: {}',
+                         fact_tables_names + event_tables_names)
             return
     # Write features
     feats_file = base_directory.join(generated_features_filename)
@@ -457,45 +806,20 @@ def main(args=None): # TODO split into outer main that catches and logs exceptio
 
     # TODO end: feature generation
 
-    # Record filters with logging discarders # TODO upgrade to add line numbers (from original file) to error messages
-    validation_logger = logging.getLogger('clean data')
-    filters = {
-        'facts': make_record_filter(
-            is_valid_fact,
-            make_discard_logger(
-                validation_logger,
-                'Discarding: Not a valid fact: {}')),
-        'events': make_record_filter(
-            is_valid_event,
-            make_discard_logger(
-                validation_logger,
-                'Discarding: Not a valid event: {}')),
-        'examples': make_record_filter(
-            is_valid_example,
-            make_discard_logger(
-                validation_logger,
-                'Discarding: Not a valid example: {}')),
-        }
-
-    # Clean data: drop events without valid patient IDs, event IDs, or
-    # times / ages
-    for name, table in tables.items():
-        treatment = tables2treats[name]
-        # Retain only valid records, discard others
-        if treatment in filters:
-            tables[name] = table.select(filters[treatment])
-
     # Generate and print all feature vectors
-    for feature_vector in barnapy.general.track_iterator(
-            generate_feature_vectors(
-                tables, treats2tables, feats, feats_key2idx),
-            lambda count: logger.info(
-                'Generated feature vectors: {}', count),
-            track_every=100,
-            track_init=True,
-            track_end=True):
-        label = feature_vector.get(2, 0) # FIXME look up label feature; don't assume numeric values
-        print_as_svmlight(label, feature_vector)
+    logger.info('Writing feature vectors to: {}',
+                args.output if args.output is not None else '<stdout>')
+    with open_output(args.output) as output:
+        for feature_vector in barnapy.general.track_iterator(
+                generate_feature_vectors(
+                    tables, treats2tables, feats, feats_key2idx),
+                lambda count: logger.info(
+                    'Generated feature vectors: {}', count),
+                track_every=100,
+                track_init=True,
+                track_end=True):
+            label = feature_vector.get(2, 0) # FIXME look up label feature; don't assume numeric values
+            print_as_svmlight(label, feature_vector, output)
 
     # Cleanup # TODO write and use context manager
     db.close()
@@ -529,7 +853,8 @@ def generate_feature_vectors(
         # examples.
         if not examples:
             continue
-        # Interpret the facts and events
+        # Interpret the facts and events.  These are generated lazily
+        # since building the event sequence consumes them only once.
         facts = interpret_facts(
             record_collection, treatments2tables['facts'], headers)
         events = interpret_events(
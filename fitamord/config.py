@@ -6,15 +6,18 @@
 
 import collections
 import datetime
+import functools
+import hashlib
+import os
 
 from barnapy import files
 from barnapy import logging
 from barnapy import parse
-from barnapy import unixutils
 import yaml
 
 from . import datatypes
 from . import delimited
+from . import file as file_
 from . import records
 
 
@@ -82,12 +85,19 @@ default = Configuration([
 # ===== Forget about all of above for now =====
 
 
+# Configuration is plain data, so only the safe loader and dumper are
+# needed.  Use their C (libyaml) implementations if available.
+_yaml_loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_yaml_dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
 # Make yaml load with ordered dicts because it is important to preserve
 # the order of fields / columns.
 yaml.add_constructor(
     yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG,
     lambda loader, node: collections.OrderedDict(
         loader.construct_pairs(node)),
+    Loader=_yaml_loader,
     )
 
 
@@ -98,40 +108,140 @@ yaml.add_representer(
         'tag:yaml.org,2002:map',
         [(dumper.represent_data(key), dumper.represent_data(val))
          for (key, val) in data.items()]),
+    Dumper=_yaml_dumper,
     )
 
 
 def load(file):
     file = files.new(file)
     with file.open('rt') as yaml_file:
-        yaml_tree = yaml.load(yaml_file)
+        yaml_tree = yaml.load(yaml_file, Loader=_yaml_loader)
     return FitamordConfig(yaml_tree, file.path)
 
 
 def save(config_obj, file, insert_defaults=False):
+    """Save the given configuration as YAML to the given file.
+
+    Does not write the file if it already has the same content.
+    Otherwise writes a temporary file and then replaces the given file
+    with it so that the file is never partially written.  The temporary
+    file is removed if writing fails.  Returns whether the file was
+    written.
+
+    """
     if isinstance(config_obj, FitamordConfig):
         config_obj = config_obj.as_yaml_object(insert_defaults)
+    text = yaml.dump(config_obj,
+                     Dumper=_yaml_dumper,
+                     version=(1, 2),
+                     explicit_start=True,
+                     explicit_end=True,
+                     default_flow_style=False,
+                     )
     file = files.new(file)
-    with file.open('wt') as yaml_file:
-        yaml.dump(config_obj,
-                  yaml_file,
-                  version=(1, 2),
-                  explicit_start=True,
-                  explicit_end=True,
-                  default_flow_style=False,
-                  )
+    # Skip writing if nothing has changed
+    if file.is_readable_file():
+        with file.open('rt') as yaml_file:
+            if yaml_file.read() == text:
+                return False
+    tmp_file = files.new(file.path + '.tmp')
+    try:
+        with tmp_file.open('wt') as yaml_file:
+            yaml_file.write(text)
+        os.replace(tmp_file.path, file.path)
+    except BaseException:
+        # Do not leave a partially written file behind
+        try:
+            os.remove(tmp_file.path)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+def has_tabular_extension(
+        filename, tabular_extensions, compression_extensions=()):
+    """Whether the given filename ends with a tabular extension,
+    optionally followed by a compression extension.
+
+    Extensions are given without their leading dots and are matched
+    case-insensitively.
+
+    """
+    # Only the last two extensions can matter
+    exts = filename.lower().rsplit('.', 2)[1:]
+    if not exts:
+        return False
+    if exts[-1] in tabular_extensions:
+        return True
+    return (len(exts) == 2
+            and exts[1] in compression_extensions
+            and exts[0] in tabular_extensions)
 
 
-def detect(directory, extensions): # TODO make reusable per-file config detection
+def find_tabular_files(
+        directory, tabular_extensions, compression_extensions=()):
+    """Return the sorted names of the files in the given directory that
+    have tabular extensions (see `has_tabular_extension`)."""
+    # Search the directory for tabular files.  Check the name before the
+    # type because checking the type may need a stat.
+    directory = files.new(directory)
+    return sorted(
+        name for (name, is_file) in _list_directory(directory.path)
+        if has_tabular_extension(
+            name, tabular_extensions, compression_extensions)
+        and is_file())
+
+
+def _list_directory(path):
+    """Generate (name, is_file) pairs for the entries in the given
+    directory, where `is_file` is a function of no arguments.
+
+    Uses `os.scandir` where available (Python 3.5+) because it can
+    usually tell files from directories without a stat.
+
+    """
+    if hasattr(os, 'scandir'):
+        for entry in os.scandir(path):
+            yield entry.name, entry.is_file
+    else:
+        for name in os.listdir(path):
+            yield name, functools.partial(
+                os.path.isfile, os.path.join(path, name))
+
+
+def detection_key(directory, filenames):
+    """Return a key that identifies the result of detecting the
+    configuration of the given files.
+
+    The key is a digest of the directory and the names and fingerprints
+    of the files, so it changes whenever any of the files is added,
+    removed, or modified.
+
+    """
+    directory = files.new(directory)
+    fingerprints = []
+    for filename in filenames:
+        fingerprint = file_.Fingerprint.from_path(
+            directory.join(filename).path)
+        fingerprints.append(
+            (filename, fingerprint.size, fingerprint.mtime_ns))
+    text = repr((os.path.realpath(directory.path), fingerprints))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def detect( # TODO make reusable per-file config detection
+        directory,
+        tabular_extensions,
+        compression_extensions=(),
+        tabular_files=None,
+):
     logger = logging.getLogger(__name__)
-    # List the directory
     directory = files.new(directory)
-    dirnames, filenames = unixutils.ls(directory.path)
-    filenames = sorted(filenames)
-    # Search for tabular files
-    patterns = ['*' + e for e in extensions]
-    tabular_files = unixutils.glob(
-        filenames, *patterns, case_sensitive=False)
+    # Search for tabular files if they were not given
+    if tabular_files is None:
+        tabular_files = find_tabular_files(
+            directory, tabular_extensions, compression_extensions)
     # Detect formats and headers of tabular files
     tables = collections.OrderedDict()
     for filename in tabular_files:
@@ -287,6 +397,10 @@ class FitamordConfig:
                 dict_['positive_label'] = self.positive_label
             if 'tables' not in dict_:
                 dict_['tables'] = None
+            else:
+                # Include any detected formats and headers
+                dict_['tables'] = collections.OrderedDict(
+                    (table.name, table.as_dict()) for table in self.tables)
             return dict_
         else:
             return self._dict
@@ -467,3 +581,26 @@ class TabularFileConfig:
         return (self._treat_as
                 if self._treat_as is not None
                 else 'events')
+
+    def as_dict(self):
+        return self._dict
+
+    def set_detected(self, format=None, header=None):
+        """Fill in the format and header of the tabular file if they
+        were not configured but have been detected.
+
+        The detected values are also added to this configuration's
+        dictionary so that they are saved with it.
+
+        """
+        if self._format is None and format is not None:
+            self._format = format
+            self._dict['format'] = collections.OrderedDict(
+                format.as_yaml_object())
+        if self._cols is None and header is not None:
+            self._cols = tuple(
+                (idx, field.name, field.type)
+                for (idx, field) in enumerate(header.fields()))
+            self._header = header
+            self._dict['columns'] = collections.OrderedDict(
+                header.as_yaml_object())
@@ -124,6 +124,20 @@ class Database:
         """Delete the named table and its data"""
         pass
 
+    def create_index(self, name, table_name, columns):
+        """Create an index with the given name on the given columns of
+        the named table if it does not already exist"""
+        pass
+
+    def analyze(self):
+        """Gather statistics about the data to help plan queries"""
+        pass
+
+    def transaction(self):
+        """Return a context manager that runs its body in a single
+        transaction"""
+        pass
+
 
 class Table(records.RecordStream):
 
@@ -158,6 +172,7 @@ class Table(records.RecordStream):
         pass
 
     def add_all(self, records):
+        """Add all the given records and return how many were added."""
         pass
 
     def update(self, predicate, cols, vals):
@@ -5,6 +5,8 @@
 
 
 import datetime
+import functools
+import re
 
 import barnapy.parse
 
@@ -16,14 +18,78 @@ class DataTypeError(Exception):
     pass
 
 
+# Fast parsers for the default formats.  `strptime` interprets its
+# format on every call, which is slow when parsing whole columns.  These
+# match precompiled patterns instead and return the same values as
+# `strptime` or `None` if the text is not exactly in the format, in
+# which case `strptime` decides (and reports any error).
+
+
+_iso_date_regex = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})\Z')
+_iso_time_regex = re.compile(r'([0-9]{2}):([0-9]{2}):([0-9]{2})\Z')
+_iso_datetime_regex = re.compile(
+    r'([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})\Z')
+
+
+def _parse_iso_date(text):
+    match = _iso_date_regex.match(text)
+    if match is None:
+        return None
+    year, month, day = match.groups()
+    try:
+        return datetime.datetime(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def _parse_iso_time(text):
+    match = _iso_time_regex.match(text)
+    if match is None:
+        return None
+    hour, minute, second = match.groups()
+    try:
+        return datetime.datetime(
+            1900, 1, 1, int(hour), int(minute), int(second))
+    except ValueError:
+        return None
+
+
+def _parse_iso_datetime(text):
+    match = _iso_datetime_regex.match(text)
+    if match is None:
+        return None
+    try:
+        return datetime.datetime(*map(int, match.groups()))
+    except ValueError:
+        return None
+
+
+_formats2fast_parsers = {
+    '%Y-%m-%d': _parse_iso_date,
+    '%H:%M:%S': _parse_iso_time,
+    '%Y-%m-%dT%H:%M:%S': _parse_iso_datetime,
+}
+
+
+# Columns of dates and times repeat values a lot (e.g. event days), so
+# remember recent results.  The results are immutable and so can be
+# shared.  Errors are raised rather than returned so that they are not
+# cached (exceptions hold tracebacks and so are not shared).
+@functools.lru_cache(maxsize=(2 ** 16))
+def _parse_datetime_cached(text, format):
+    fast_parser = _formats2fast_parsers.get(format)
+    if fast_parser is not None:
+        dt = fast_parser(text)
+        if dt is not None:
+            return dt
+    return datetime.datetime.strptime(text, format)
+
+
 def parse_datetime(text, format='%Y-%m-%dT%H:%M:%S'):
-    dt = None
-    err = None
     try:
-        dt = datetime.datetime.strptime(text, format)
+        return _parse_datetime_cached(text, format), None
     except ValueError as e:
-        err = e
-    return dt, err
+        return None, e
 
 
 def is_datetime(text, format='%Y-%m-%dT%H:%M:%S'):
@@ -79,7 +145,14 @@ class PythonType:
 
 
 class TextValueType(PythonType):
-    """Data types whose values can be represented as textual atoms."""
+    """Data types whose values can be represented as textual atoms.
+
+    The functions `is_repr`, `parse`, and `format` are called with the
+    text (or object) followed by the arguments of the type, if any, so
+    that functions like `barnapy.parse.int_err` can be used directly
+    without wrapping.
+
+    """
 
     def __init__(self, name, type_, args, is_repr, parse, format):
         super().__init__(type_)
@@ -94,16 +167,16 @@ class TextValueType(PythonType):
         return self._name
 
     def isrepr(self, text):
-        return self._is_repr(self._args, text)
+        return self._is_repr(text, *self._args)
 
     def parse(self, text):
         if not isinstance(text, str):
             return None, ValueError(
                 'Cannot parse: Not a string: {!r}'.format(text))
-        return self._parse(self._args, text)
+        return self._parse(text, *self._args)
 
     def format(self, obj):
-        return self._format(self._args, obj)
+        return self._format(obj, *self._args)
 
     def __str__(self):
         if self._args:
@@ -129,6 +202,12 @@ class TextValueType(PythonType):
         return hash((type(self), self.name, self.type, self._args))
 
     def derive(self, args):
+        # The functions take as many arguments as this type has
+        args = tuple(args)
+        if len(args) > len(self._args):
+            raise DataTypeError(
+                'Too many arguments for data type: {}{!r} (takes at most {})'
+                .format(self.name, args, len(self._args)))
         return TextValueType(
             self.name,
             self.type,
@@ -139,16 +218,12 @@ class TextValueType(PythonType):
         )
 
 
-def _add_dummy_arg1(func):
-    return lambda a, b: func(b)
-
-
 Atom = TextValueType(
     'Atom',
     object,
     (),
-    _add_dummy_arg1(barnapy.parse.is_atom),
-    _add_dummy_arg1(barnapy.parse.atom_err),
+    barnapy.parse.is_atom,
+    barnapy.parse.atom_err,
     repr,
 )
 
@@ -156,8 +231,8 @@ Bool = TextValueType(
     'Bool',
     bool,
     (),
-    _add_dummy_arg1(barnapy.parse.is_bool),
-    _add_dummy_arg1(barnapy.parse.bool_err),
+    barnapy.parse.is_bool,
+    barnapy.parse.bool_err,
     repr,
 )
 
@@ -165,8 +240,8 @@ Int = TextValueType(
     'Int',
     int,
     (),
-    _add_dummy_arg1(barnapy.parse.is_int),
-    _add_dummy_arg1(barnapy.parse.int_err),
+    barnapy.parse.is_int,
+    barnapy.parse.int_err,
     repr,
 )
 
@@ -174,8 +249,8 @@ Float = TextValueType(
     'Float',
     float,
     (),
-    _add_dummy_arg1(barnapy.parse.is_float),
-    _add_dummy_arg1(barnapy.parse.float_err),
+    barnapy.parse.is_float,
+    barnapy.parse.float_err,
     repr,
 )
 
@@ -183,8 +258,8 @@ String = TextValueType(
     'String',
     str,
     (),
-    lambda args, text: True,
-    lambda args, text: (text, None),
+    lambda text: True,
+    lambda text: (text, None),
     str,
 )
 
@@ -192,27 +267,27 @@ Date = TextValueType(
     'Date',
     datetime.date,
     ('%Y-%m-%d',),
-    lambda args, text: is_datetime(text, args[0]),
-    lambda args, text: parse_date(text, args[0]),
-    lambda args, date: date.strftime(args[0]),
+    is_datetime,
+    parse_date,
+    datetime.date.strftime,
 )
 
 Time = TextValueType(
     'Time',
     datetime.time,
     ('%H:%M:%S',),
-    lambda args, text: is_datetime(text, args[0]),
-    lambda args, text: parse_time(text, args[0]),
-    lambda args, time: time.strftime(args[0]),
+    is_datetime,
+    parse_time,
+    datetime.time.strftime,
 )
 
 DateTime = TextValueType(
     'DateTime',
     datetime.datetime,
     ('%Y-%m-%dT%H:%M:%S',),
-    lambda args, text: is_datetime(text, args[0]),
-    lambda args, text: parse_datetime(text, args[0]),
-    lambda args, datm: datm.strftime(args[0]),
+    is_datetime,
+    parse_datetime,
+    datetime.datetime.strftime,
 )
 
 
@@ -251,6 +326,12 @@ def parse(text):
 
     Return a (data type, error) pair per Go style.
     """
+    # Plain lowercase names without arguments need no parsing.  Only
+    # look up strings because other objects may not be hashable.
+    if isinstance(text, str):
+        datatype = names2datatypes.get(text)
+        if datatype is not None:
+            return datatype, None
     val, err = barnapy.parse.predicate_err(text)
     if err is not None:
         return None, err
@@ -262,5 +343,8 @@ def parse(text):
             .format(name, ', '.join(names2datatypes.keys())))
     datatype = names2datatypes[name_lower]
     if args:
-        datatype = datatype.derive(args)
+        try:
+            datatype = datatype.derive(args)
+        except DataTypeError as e:
+            return None, e
     return (datatype, None)
@@ -26,6 +26,10 @@ from . import general
 from . import records
 
 
+# Read data files in large chunks to reduce the number of reads
+_read_buffer_size = 2 ** 20
+
+
 class EscapeStyle(Enum):
     """Enumeration of styles of escaping quotation marks"""
     escaping = 1
@@ -328,8 +332,15 @@ class File:
     def header(self):
         return self._header
 
-    def reader(self, is_missing=None, error_handler=None):
-        return Reader(
+    def reader(self, is_missing=None, error_handler=None, columns=None):
+        """Return a reader for the records in this file.
+
+        If columns are given, the reader is projected onto them, which
+        means only those fields are checked for missing values and
+        parsed.
+
+        """
+        reader = Reader(
             path=self.path,
             format=self.format,
             name=self.name,
@@ -337,6 +348,9 @@ class File:
             is_missing=is_missing,
             error_handler=error_handler,
         )
+        if columns is not None:
+            reader = reader.project(*columns)
+        return reader
 
     def init_from_file(self, sample_size=(2 ** 20)):
         logger = logging.getLogger(general.fq_typename(self))
@@ -374,6 +388,7 @@ class Reader(records.RecordStream): # TODO enable to be context manager?
         self._header = header
         self._is_missing = is_missing
         self._inv_projection = None
+        self._filter_predicate = None
         super().__init__(
             records=None,
             name=self._name,
@@ -411,6 +426,15 @@ class Reader(records.RecordStream): # TODO enable to be context manager?
         records._inv_projection = new2old_field_idxs
         return records
 
+    def select(self, predicate):
+        # Create new record stream that retains only the records that
+        # satisfy the predicate.  The predicate is applied as records
+        # are read so that rejected records are never materialized
+        # elsewhere.
+        records = copy.copy(self)
+        records._filter_predicate = predicate
+        return records
+
     def _record_iterator(self):
         # Must have a format in order to read the file
         if self._format is None:
@@ -421,6 +445,7 @@ class Reader(records.RecordStream): # TODO enable to be context manager?
             str(self.path),
             comment_char=self._format.comment_char,
             skip_blank_lines=self._format.skip_blank_lines,
+            buffering=_read_buffer_size,
             )
         # Create CSV reader
         csv_reader = csv.reader(
@@ -441,14 +466,18 @@ class Reader(records.RecordStream): # TODO enable to be context manager?
                     parsers.append(datatypes.types2datatypes[typ].parse)
                 else:
                     parsers.append(None)
-        # Make record processing loop and return
-        return project_transform_records(
+        # Make record processing loop
+        records_ = project_transform_records(
             csv_reader,
             parsers,
             self._is_missing,
             self._error_handler,
             self._inv_projection,
             )
+        # Filter records in the same pass, if requested
+        if self._filter_predicate is not None:
+            records_ = filter(self._filter_predicate, records_)
+        return records_
 
 
 def project_transform_records(
@@ -459,23 +488,28 @@ def project_transform_records(
         inv_projection=None,
 ):
     n_fields = len(transformers)
+    # Pair each output index with its input index and transformer once
+    # rather than looking them up for every field of every record
+    in_idxs = (inv_projection
+               if inv_projection is not None
+               else range(n_fields))
+    field_specs = tuple(
+        (out_idx, in_idx, transformer)
+        for (out_idx, (in_idx, transformer))
+        in enumerate(zip(in_idxs, transformers)))
     for record in records_:
         err = None
         new_record = [None] * n_fields
-        for out_idx in range(n_fields):
-            # Find the input index corresponding to the output index
-            in_idx = (inv_projection[out_idx]
-                      if inv_projection is not None
-                      else out_idx)
+        n_in_fields = len(record)
+        for out_idx, in_idx, transformer in field_specs:
             # Leave field as None if it doesn't exist in record
-            if in_idx >= len(record):
+            if in_idx >= n_in_fields:
                 continue
             field = record[in_idx]
             # Leave field as None if missing
             if is_missing is not None and is_missing(field):
                 continue
             # Transform the field if defined
-            transformer = transformers[out_idx]
             if transformer is None:
                 new_record[out_idx] = field
             else:
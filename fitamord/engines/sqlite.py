@@ -4,7 +4,9 @@
 # under the MIT License.  See `LICENSE.txt` for details.
 
 
+import contextlib
 import copy
+import itertools as itools
 import sqlite3
 import sys
 
@@ -24,6 +26,13 @@ def gen_fetchmany(cursor):
         yield from rows
         rows = cursor.fetchmany()
 
+# Default maximum number of parameters in a single statement for when
+# the limit of a connection cannot be queried.  SQLite raised the
+# default limit from 999 in version 3.32.0.
+max_params = (32766
+              if sqlite3.sqlite_version_info >= (3, 32, 0)
+              else 999)
+
 python2sqlite_types = {
     bytes: 'blob',
     float: 'real',
@@ -43,22 +52,32 @@ class SqliteDb(database.Database):
             cursor_array_size=(8 * 2 ** 10), # 8Ki
             db_cache_size=(2 * 2 ** 30), # 2 GiB in bytes
             db_mmap_size=(1 * 2 ** 30), # 1 GiB in bytes
+            insert_batch_size=5000,
+            journal_mode=None,
+            synchronous=None,
     ):
         self._filename = (filename
                           if filename is not None
                           else ':memory:')
         self._cursor_array_size = cursor_array_size
+        self._insert_batch_size = insert_batch_size
         self._db_cache_size = db_cache_size
         self._db_mmap_size = db_mmap_size
         repr_id = repr(self) + '@' + hex(id(self))
         self._logger = logging.getLogger(repr_id)
         self._logger.info(
-            'Opening connection to Sqlite DB: {}'
-            .format(self._filename))
+            'Opening connection to Sqlite DB: {}', self._filename)
         # TODO open and maintain a connection at the object level but what about committing, closing the connection, etc.?
         self._connection = sqlite3.connect(self._filename)
         self._logger.info('Connected')
+        # Read the parameter limit from the connection (Python 3.11+)
+        # because it depends on how SQLite was built and configured
+        self._max_params = (
+            self._connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+            if hasattr(self._connection, 'getlimit')
+            else max_params)
         self._tables = {} # References to tables are circular
+        self._in_transaction = False
 
         # Configure connection via pragmas.  (Pragmas don't work with
         # the "?" parameter syntax, so use formatting instead.)
@@ -72,6 +91,20 @@ class SqliteDb(database.Database):
             self._db_mmap_size))
         self._logger.info('DB mmap size: {}', self._connection.execute(
             'pragma mmap_size').fetchall()[0][0])
+        # Set the journal mode, remembering the original so that it can
+        # be restored on closing.  (WAL mode persists in the DB file.)
+        self._orig_journal_mode = None
+        if journal_mode is not None:
+            self._orig_journal_mode = self._connection.execute(
+                'pragma journal_mode').fetchall()[0][0]
+            self._logger.info('DB journal mode: {}', self._connection.execute(
+                'pragma journal_mode = {}'.format(journal_mode))
+                .fetchall()[0][0])
+        if synchronous is not None:
+            self._connection.execute(
+                'pragma synchronous = {}'.format(synchronous))
+            self._logger.info('DB synchronous: {}', self._connection.execute(
+                'pragma synchronous').fetchall()[0][0])
 
     def close(self):
         """Close and invalidate the database connection"""
@@ -84,12 +117,20 @@ class SqliteDb(database.Database):
             for table in self._tables.values():
                 table.disconnect()
             self._tables.clear()
+        # Restore the original journal mode
+        if self._orig_journal_mode is not None:
+            try:
+                self._connection.execute('pragma journal_mode = {}'.format(
+                    self._orig_journal_mode))
+            except Exception as e:
+                self._logger.exception(
+                    'Failed to restore DB journal mode: {}', e)
         # Close the DB connection
         try:
             self._connection.close()
         except Exception as e:
             self._logger.exception(
-                'Failed to close DB connection: {}'.format(e))
+                'Failed to close DB connection: {}', e)
         else:
             self._logger.info('DB connection closed')
         finally:
@@ -106,12 +147,15 @@ class SqliteDb(database.Database):
         return '{}({!r})'.format(
             general.fq_typename(self), self._filename)
 
-    def execute_query(self, query, parameters=None):
-        self._logger.info(
-            'Executing query: {}; parameters: {}'
-            .format(query, parameters))
+    def cursor(self):
         cursor = self._connection.cursor()
         cursor.arraysize = self._cursor_array_size
+        return cursor
+
+    def execute_query(self, query, parameters=None):
+        self._logger.info(
+            'Executing query: {}; parameters: {}', query, parameters)
+        cursor = self.cursor()
         if parameters is None:
             cursor.execute(query)
         else:
@@ -120,13 +164,54 @@ class SqliteDb(database.Database):
 
     def execute_many(self, query, parameters):
         self._logger.info(
-            'Executing query: {}; parameters: {}'
-            .format(query, parameters))
-        cursor = self._connection.cursor()
-        cursor.arraysize = self._cursor_array_size
+            'Executing query: {}; parameters: {}', query, parameters)
+        cursor = self.cursor()
         cursor.executemany(query, parameters)
         return cursor
 
+    _insert_sql = 'insert into {} {} values {}'
+
+    def insert_many(self, name, col_names, records):
+        """Insert the given records into the named table.
+
+        Inserts batches of records with multi-row `insert` statements to
+        avoid the overhead of executing a statement per record.  Each
+        record must have a value for each of the given columns.  Returns
+        the number of records inserted.
+        """
+        col_names = list(col_names)
+        n_cols = len(col_names)
+        # Limit the batch size so that statements are within the
+        # parameter limit
+        batch_size = max(1, min(self._insert_batch_size,
+                                self._max_params // n_cols))
+        cols_def = '(' + ', '.join(database.quote_name(n)
+                                   for n in col_names) + ')'
+        placeholder = placeholders_for_params(n_cols)
+        table_name = database.quote_name(name)
+        self._logger.info(
+            'Inserting into {} {} in batches of {} records',
+            table_name, cols_def, batch_size)
+        # Insert full batches with the same statement and the final
+        # partial batch, if any, with a shorter statement
+        cursor = self.cursor()
+        query = None
+        query_size = 0
+        n_records = 0
+        records = iter(records)
+        batch = list(itools.islice(records, batch_size))
+        while batch:
+            if len(batch) != query_size:
+                query_size = len(batch)
+                query = self._insert_sql.format(
+                    table_name, cols_def,
+                    ', '.join(itools.repeat(placeholder, query_size)))
+            cursor.execute(
+                query, tuple(itools.chain.from_iterable(batch)))
+            n_records += query_size
+            batch = list(itools.islice(records, batch_size))
+        return n_records
+
     def _catalog_table_name(self, namespace):
         # Construct and check the catalog table name
         catalog_table_name = namespace + '.sqlite_master'
@@ -241,6 +326,24 @@ class SqliteDb(database.Database):
             raise database.DbError(
                 'Drop table returned rows: {}'.format(rows))
 
+    _create_index_sql = 'create index if not exists {} on {} ({})'
+
+    def create_index(self, name, table_name, columns):
+        query = self._create_index_sql.format(
+            database.quote_name(name),
+            database.quote_name(table_name),
+            ', '.join(database.quote_name(col) for col in columns))
+        rows = list(gen_fetchmany(self.execute_query(query)))
+        if rows:
+            raise database.DbError(
+                'Create index returned rows: {}'.format(rows))
+
+    def analyze(self):
+        rows = list(gen_fetchmany(self.execute_query('analyze')))
+        if rows:
+            raise database.DbError(
+                'Analyze returned rows: {}'.format(rows))
+
     def table(self, name):
         dotted_name, namespace, obj_name = self._process_name(name)
         # Return the table from the cache if it exists
@@ -260,8 +363,70 @@ class SqliteDb(database.Database):
         # Use a text representation if no other specific type
         return python2sqlite_types.get(python_type, 'text')
 
-    def commit(self):
+    # Pragmas for bulk loading.  Durability is relaxed because the
+    # loading of each table is tracked and redone if it did not finish.
+    # The journal is left alone so that rollbacks still work.
+    _bulk_load_pragmas = (
+        ('synchronous', 'off'),
+        ('temp_store', 'memory'),
+    )
+
+    @contextlib.contextmanager
+    def bulk_load(self):
+        """Context manager that tunes the connection for bulk loading.
+
+        The previous settings are restored when the context exits.
+        """
+        previous = []
+        for name, value in self._bulk_load_pragmas:
+            previous.append((name, self._connection.execute(
+                'pragma {}'.format(name)).fetchall()[0][0]))
+            self._connection.execute(
+                'pragma {} = {}'.format(name, value))
+        self._logger.info('Bulk loading with pragmas: {}',
+                          self._bulk_load_pragmas)
+        try:
+            yield self
+            self.commit()
+        finally:
+            for name, value in previous:
+                self._connection.execute(
+                    'pragma {} = {}'.format(name, value))
+            self._logger.info('Restored pragmas: {}', previous)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Context manager that runs its body in a single transaction.
+
+        Commits when the context exits normally and rolls back if it
+        exits with an exception.  Commits within the body (e.g. by
+        `Table.add_all`) are deferred to the end of the transaction so
+        that the body is committed, and synced, only once.
+        """
+        # Finish any implicit transaction and take over transaction
+        # control from the sqlite3 module so that it does not commit
+        # implicitly (e.g. before DDL in older Pythons)
         self._connection.commit()
+        isolation_level = self._connection.isolation_level
+        self._connection.isolation_level = None
+        self._connection.execute('begin immediate')
+        self._in_transaction = True
+        try:
+            yield self
+        except BaseException:
+            self._in_transaction = False
+            self._connection.rollback()
+            raise
+        else:
+            self._in_transaction = False
+            self._connection.commit()
+        finally:
+            self._connection.isolation_level = isolation_level
+
+    def commit(self):
+        # Commit at the end of an explicit transaction instead
+        if not self._in_transaction:
+            self._connection.commit()
 
     def rollback(self):
         self._connection.rollback()
@@ -348,30 +513,20 @@ class Table(database.Table):
 
     # Writing
 
-    _add_all_sql = 'insert into {} {} values {}'
-
     def add_all(self, records):
         self.assert_connected()
         header = (records.header
                   if isinstance(records, recs.RecordStream)
                   else self.header)
-        # Assemble query
-        col_names = '(' + ', '.join(database.quote_name(n)
-                                    for n in header.names()) + ')'
-        param_placeholder = placeholders_for_params(self.n_cols)
-        query = self._add_all_sql.format(
-            database.quote_name(self.name), col_names,
-            param_placeholder)
-        # Run query
-        cursor = self._db.execute_many(query, records)
-        rows = list(gen_fetchmany(cursor))
-        if rows:
+        try:
+            n_rows = self._db.insert_many(
+                self.name, header.names(), records)
+        except Exception:
             self._db.rollback()
-            raise database.DbError(
-                'Insert returned rows: {}'.format(rows))
+            raise
         self._db.commit()
-        if cursor.rowcount > 0:
-            self._n_rows += cursor.rowcount
+        self._n_rows += n_rows
+        return n_rows
 
     _clear_sql = 'delete from {}'
 
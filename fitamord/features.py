@@ -19,6 +19,7 @@
 
 from enum import Enum
 import io
+import sys
 
 from barnapy import files
 from barnapy import logging
@@ -66,6 +67,13 @@ def make_identifier(*objs):
         str_w_empty_none(o).strip().replace(' ', '_') for o in objs)
 
 
+def _intern(obj):
+    # Intern strings, which repeat a lot as parts of keys
+    if type(obj) is str:
+        return sys.intern(obj)
+    return obj
+
+
 class Feature: # TODO rework to separate out random variable aspects from association to relation
 
     # Features do not have IDs because they need to be numbered as a
@@ -101,6 +109,11 @@ class Feature: # TODO rework to separate out random variable aspects from associ
             rv_type=None,
             function=None,
             ):
+        # Share the strings that make up the key with those in the
+        # interpreted records so that comparing them is cheap
+        table_name = _intern(table_name)
+        field_name = _intern(field_name)
+        value = _intern(value)
         self._name = name
         self._table_name = table_name
         self._field_name = field_name
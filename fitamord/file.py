@@ -9,7 +9,6 @@ import csv
 import io
 import os
 import pathlib
-import re
 
 from barnapy import parse
 
@@ -51,7 +50,7 @@ class Fingerprint:
 # Functional file API
 
 
-def open(file, mode='rt', compression='auto'):
+def open(file, mode='rt', compression='auto', buffering=-1):
     """Open a file with optional (de)compression.
 
     file: Filename (str) or pathlib.Path object
@@ -65,6 +64,10 @@ def open(file, mode='rt', compression='auto'):
         the specific compression to use, either as the compression name
         or a commonly-associated filename extension.
 
+    buffering: Buffer size as in the standard io.open.  Only applies
+        to uncompressed files.  The decompressors do their own
+        buffering.
+
     """
     # Check and convert arguments
     path = None
@@ -89,34 +92,104 @@ def open(file, mode='rt', compression='auto'):
     # support for various compressions in the standard library.)
     filename = str(path)
     if compression is None:
-        return io.open(filename, mode=mode)
+        return io.open(filename, mode=mode, buffering=buffering)
     # Use gzip for all common Lempel-Ziv compression suffixes
     elif compression in ('gz', 'z', 'Z', 'gzip'):
-        import gzip
-        return gzip.open(filename, mode=mode)
+        return (_open_decompressor_output('gzip', filename, mode)
+                or _open_gzip(filename, mode))
     elif compression in ('bz2', 'bzip2'):
-        import bz2
-        return bz2.open(filename, mode=mode)
+        return (_open_decompressor_output('bzip2', filename, mode)
+                or _open_bz2(filename, mode))
     elif compression in ('xz', 'lzma'):
-        import lzma
-        return lzma.open(filename, mode=mode)
+        return (_open_decompressor_output('lzma', filename, mode)
+                or _open_lzma(filename, mode))
     elif auto:
         # No compression detected
-        return io.open(filename, mode=mode)
+        return io.open(filename, mode=mode, buffering=buffering)
     else:
         raise ValueError(
             'Unrecognized compression type: {}'.format(compression))
 
 
-def read_lines(file, compression='auto'):
+def _open_gzip(filename, mode):
+    import gzip
+    return gzip.open(filename, mode=mode)
+
+
+def _open_bz2(filename, mode):
+    import bz2
+    return bz2.open(filename, mode=mode)
+
+
+def _open_lzma(filename, mode):
+    import lzma
+    return lzma.open(filename, mode=mode)
+
+
+# External decompression commands by compression type in order of
+# preference.  These decompress using multiple threads and, in any
+# case, in a separate process, concurrently with parsing.
+_decompressor_commands = {
+    'gzip': (('pigz', '-dc'),),
+    'bzip2': (('lbzip2', '-dc'), ('pbzip2', '-dc')),
+    'lzma': (('xz', '-T0', '-dc'),),
+}
+
+
+class _DecompressorOutput(io.TextIOWrapper):
+    """Text stream of the output of a decompression process that
+    cleans up the process when closed"""
+
+    def __init__(self, process):
+        super().__init__(process.stdout)
+        self._process = process
+
+    def close(self):
+        if self.closed:
+            return
+        # Check that the process succeeded if all of its output was
+        # read, otherwise (e.g. reading stopped early) stop it
+        at_end = not self.buffer.peek(1)
+        super().close()
+        if not at_end:
+            self._process.kill()
+            self._process.wait()
+        elif self._process.wait() != 0:
+            raise OSError(
+                'Decompression failed with exit status {}: {}'.format(
+                    self._process.returncode, self._process.args))
+
+
+def _open_decompressor_output(compression, filename, mode):
+    """Open the output of an external decompression command as a text
+    stream.  Returns `None` if the mode is not for reading text or if no
+    command is available or the file does not exist."""
+    # Leave errors like nonexistent files to the standard library
+    if mode not in ('r', 'rt') or not os.path.isfile(filename):
+        return None
+    import shutil
+    import subprocess
+    for command in _decompressor_commands.get(compression, ()):
+        if shutil.which(command[0]) is not None:
+            # End the options so that a filename starting with a hyphen
+            # is not taken as an option
+            process = subprocess.Popen(
+                command + ('--', filename),
+                stdout=subprocess.PIPE, bufsize=(2 ** 20))
+            return _DecompressorOutput(process)
+    return None
+
+
+def read_lines(file, compression='auto', buffering=-1):
     """Open a text file for reading lines and automatically close when done.
 
     Returns an iterator over lines after opening the file with
-    `open(file, mode='rt', compression)`.  See `open` in this module for
-    details.
+    `open(file, mode='rt', compression, buffering)`.  See `open` in
+    this module for details.
 
     """
-    with open(file, mode='rt', compression=compression) as lines:
+    with open(file, mode='rt', compression=compression,
+              buffering=buffering) as lines:
         for line in lines:
             yield line
     # File closes as soon as reading is finished
@@ -153,16 +226,13 @@ def read_content_lines(
         file = read_lines(file, compression=compression)
     # Otherwise assume open file or other iterable of lines
 
-    # Create pattern for detecting comments.  Quote the comment
-    # character to avoid regex injection.
-    comment_pattern = re.compile('\s*' + re.escape(comment_char))
-
     # Iterate over lines in the file.  Line numbers start at 1.
     line_num = 0
     for line in file:
         line_num += 1
-        # Ignore comment lines
-        if comment_pattern.match(line) is not None:
+        # Ignore comment lines.  Detect comments with plain string
+        # methods, which are cheaper than matching a regex per line.
+        if line.lstrip().startswith(comment_char):
             continue
         # Ignore blank lines (if desired)
         elif skip_blank_lines and line.isspace():
@@ -189,6 +259,7 @@ class ContentReader:
             compression='auto',
             comment_char='#',
             skip_blank_lines=True,
+            buffering=-1,
             ):
         """Create a new ContentReader.
 
@@ -203,11 +274,14 @@ class ContentReader:
         skip_blank_lines: Whether to skip blank lines or treat them as
             records
 
+        buffering: Buffer size.  See `open` in this module.
+
         """
         self._file = file
         self._compression = compression
         self._comment_char = comment_char
         self._skip_blank_lines = skip_blank_lines
+        self._buffering = buffering
         self._line_num = 0
 
     def __iter__(self):
@@ -215,23 +289,19 @@ class ContentReader:
         # Open file if needed
         if isinstance(self._file, (str, pathlib.Path)):
             self._file = read_lines(
-                self._file, compression=self._compression)
+                self._file, compression=self._compression,
+                buffering=self._buffering)
         # Otherwise assume open file or other iterable of lines
 
-        # Create pattern for detecting comments.  Quote the comment
-        # character to avoid regex injection.
-        comment_pattern = (
-            re.compile('\s*' + re.escape(self._comment_char))
-            if self._comment_char
-            else None)
+        comment_char = self._comment_char
 
         # Iterate over lines in the file.  Line numbers start at 1.
         self._line_num = 0
         for line in self._file:
             self._line_num += 1
-            # Ignore comment lines
-            if (comment_pattern is not None
-                    and comment_pattern.match(line) is not None):
+            # Ignore comment lines.  Detect comments with plain string
+            # methods, which are cheaper than matching a regex per line.
+            if comment_char and line.lstrip().startswith(comment_char):
                 continue
             # Ignore blank lines (if desired)
             elif self._skip_blank_lines and line.isspace():
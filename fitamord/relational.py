@@ -4,6 +4,7 @@
 # under the MIT License.  See `LICENSE.txt` for details.
 
 
+import heapq
 import itertools as itools
 import operator
 
@@ -141,59 +142,48 @@ class MergeCollect(Relations):
                 '{}: Column not found: {!r}'.format(relation.name, key))
         return relation, key
 
+    @staticmethod
+    def _next_group(groupby):
+        """Return the next (key, group) pair whose key is not None or
+        None if the group-by iterator is exhausted."""
+        key_group = next(groupby, None)
+        while key_group is not None and key_group[0] is None:
+            key_group = next(groupby, None)
+        return key_group
+
     def merge_collect(self):
         """Silently skips any records whose key is None""" # TODO discard bad records instead?
-        # Get the initial key-group pairs
-        keys_groups = [next(gb, None) for gb in self._groupbys]
-        # Increment until all the keys are not None (discard groups with
-        # keys that are None)
-        for idx in range(len(keys_groups)):
-            while (keys_groups[idx] is not None
-                   and keys_groups[idx][0] is None):
-                keys_groups[idx] = next(self._groupbys[idx], None)
-        # Get the initial keys (which should not be None unless the
-        # corresponding group-by iterator is exhausted)
-        keys = [(kg[0] if kg is not None else None)
-                for kg in keys_groups]
+        # Keep a heap of the (key, index) pairs of the current groups so
+        # that finding the minimum key takes logarithmic rather than
+        # linear time in the number of relations.  Including the index
+        # makes the pairs unique and so never compares groups.
+        groups = [None] * len(self._groupbys)
+        heap = []
+        for idx, groupby in enumerate(self._groupbys):
+            key_group = self._next_group(groupby)
+            if key_group is not None:
+                heap.append((key_group[0], idx))
+                groups[idx] = key_group[1]
+        heapq.heapify(heap)
         # Loop while any of the groupby iterators have items
-        while any(keys_groups):
-            # Find the indices of the minimum keys
-            min_key, min_idxs = indices_of_minimums(keys)
+        while heap:
+            # Pop the indices of the minimum keys
+            min_key, min_idx = heapq.heappop(heap)
+            min_idxs = [min_idx]
+            while heap and heap[0][0] == min_key:
+                min_idxs.append(heapq.heappop(heap)[1])
             # Build the collection of records
             records = CollectedRecords(min_key, self)
             for min_idx in min_idxs:
-                records.add(
-                    self.name_at(min_idx),
-                    list(keys_groups[min_idx][1]))
+                records.add(self.name_at(min_idx), list(groups[min_idx]))
             yield records
             # Increment
             for min_idx in min_idxs:
-                # Get the next group
-                keys_groups[min_idx] = next(
-                    self._groupbys[min_idx], None)
-                # Increment until the key is not None (discard groups
-                # with keys that are None)
-                while (keys_groups[min_idx] is not None
-                       and keys_groups[min_idx][0] is None):
-                    keys_groups[min_idx] = next(
-                        self._groupbys[min_idx], None)
-                # Get the key for the next group
-                keys[min_idx] = (keys_groups[min_idx][0]
-                                 if keys_groups[min_idx] is not None
-                                 else None)
+                key_group = self._next_group(self._groupbys[min_idx])
+                if key_group is not None:
+                    heapq.heappush(heap, (key_group[0], min_idx))
+                    groups[min_idx] = key_group[1]
+                else:
+                    groups[min_idx] = None
 
     __iter__ = merge_collect
-
-
-def indices_of_minimums(values): # TODO move somewhere appropriate
-    min_value = None
-    min_idxs = []
-    for idx, value in enumerate(values):
-        if value is None:
-            continue
-        if min_value is None or value < min_value:
-            min_value = value
-            min_idxs = [idx]
-        elif value == min_value:
-            min_idxs.append(idx)
-    return min_value, min_idxs
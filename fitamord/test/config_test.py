@@ -0,0 +1,211 @@
+"""Tests config.py"""
+
+# Copyright (c) 2018 Aubrey Barnard.  This is free software released
+# under the MIT License.  See `LICENSE.txt` for details.
+
+
+import collections
+import os
+import tempfile
+import types
+import unittest
+import unittest.mock
+
+from .. import config
+
+
+class DetectionKeyTest(unittest.TestCase):
+
+    _filenames = ('a.csv', 'b.csv')
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+        for filename in self._filenames:
+            with open(self.path(filename), 'wt') as file:
+                file.write('id,x\n1,2\n')
+            self.set_mtime_ns(filename, 1500000000 * 10 ** 9)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def set_mtime_ns(self, filename, mtime_ns):
+        os.utime(self.path(filename), ns=(mtime_ns, mtime_ns))
+
+    def key(self):
+        return config.detection_key(self.directory, self._filenames)
+
+    def test_unchanged(self):
+        key = self.key()
+        self.assertEqual(key, self.key())
+        # Reading or rewriting the same content at the same time does
+        # not matter
+        with open(self.path('a.csv'), 'rt') as file:
+            file.read()
+        with open(self.path('b.csv'), 'wt') as file:
+            file.write('id,x\n1,2\n')
+        self.set_mtime_ns('b.csv', 1500000000 * 10 ** 9)
+        self.assertEqual(key, self.key())
+
+    def test_mtime_changed(self):
+        key = self.key()
+        self.set_mtime_ns('b.csv', 1500000001 * 10 ** 9)
+        self.assertNotEqual(key, self.key())
+        self.set_mtime_ns('b.csv', 1500000000 * 10 ** 9)
+        self.assertEqual(key, self.key())
+
+    def test_size_changed(self):
+        key = self.key()
+        with open(self.path('a.csv'), 'at') as file:
+            file.write('3,4\n')
+        # Same modification time
+        self.set_mtime_ns('a.csv', 1500000000 * 10 ** 9)
+        self.assertNotEqual(key, self.key())
+
+    def test_files_changed(self):
+        key = self.key()
+        self.assertNotEqual(
+            key, config.detection_key(self.directory, ['a.csv']))
+        self.assertNotEqual(
+            key, config.detection_key(self.directory, ['b.csv', 'a.csv']))
+
+
+class SaveTest(unittest.TestCase):
+
+    _config = collections.OrderedDict((
+        ('is_missing', ['', 'na']),
+        ('positive_label', 1),
+    ))
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(
+            self._directory.name, 'fitamord_config.yaml')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_save_unchanged(self):
+        self.assertTrue(config.save(self._config, self.filename))
+        mtime_ns = 1500000000 * 10 ** 9
+        os.utime(self.filename, ns=(mtime_ns, mtime_ns))
+        self.assertFalse(config.save(self._config, self.filename))
+        self.assertEqual(mtime_ns, os.stat(self.filename).st_mtime_ns)
+        self.assertEqual(['fitamord_config.yaml'],
+                         os.listdir(self._directory.name))
+        # Saving different content writes the file
+        config_obj = collections.OrderedDict(self._config)
+        config_obj['positive_label'] = 0
+        self.assertTrue(config.save(config_obj, self.filename))
+        self.assertNotEqual(mtime_ns, os.stat(self.filename).st_mtime_ns)
+
+    def test_no_tmp_file_after_failure(self):
+        self.assertTrue(config.save(self._config, self.filename))
+        with open(self.filename, 'rt') as file:
+            text = file.read()
+        config_obj = collections.OrderedDict(self._config)
+        config_obj['positive_label'] = 0
+        with unittest.mock.patch.object(
+                config.os, 'replace', side_effect=OSError('failed')):
+            with self.assertRaises(OSError):
+                config.save(config_obj, self.filename)
+        self.assertEqual(['fitamord_config.yaml'],
+                         os.listdir(self._directory.name))
+        # The original file is intact
+        with open(self.filename, 'rt') as file:
+            self.assertEqual(text, file.read())
+
+
+class TabularFilesTest(unittest.TestCase):
+
+    _tabular_extensions = frozenset(('csv', 'tsv'))
+    _compression_extensions = frozenset(('gz', 'bz2', 'xz'))
+
+    _filenames = (
+        ('x.csv', True),
+        ('x.tsv', True),
+        ('x.csv.gz', True),
+        ('x.tsv.xz', True),
+        ('x.y.csv.bz2', True),
+        ('x.CSV', True),
+        ('X.Csv.GZ', True),
+        ('x.csv.tar', False),
+        ('x.gz', False),
+        ('x.gz.csv.zip', False),
+        ('x.txt', False),
+        ('x.txt.gz', False),
+        ('x.gz.gz', False),
+        ('.gz', False),
+        ('csv', False),
+        ('csvgz', False),
+        ('x', False),
+        ('x.', False),
+        ('', False),
+    )
+
+    def has_tabular_extension(self, filename):
+        return config.has_tabular_extension(
+            filename,
+            self._tabular_extensions,
+            self._compression_extensions)
+
+    def test_has_tabular_extension(self):
+        for filename, expected in self._filenames:
+            with self.subTest(filename=filename):
+                self.assertEqual(
+                    expected, self.has_tabular_extension(filename))
+
+    def test_has_tabular_extension_without_compression(self):
+        self.assertTrue(config.has_tabular_extension(
+            'x.csv', self._tabular_extensions))
+        self.assertFalse(config.has_tabular_extension(
+            'x.csv.gz', self._tabular_extensions))
+
+    def make_directory(self, directory):
+        for filename, _ in self._filenames:
+            if filename:
+                with open(os.path.join(directory, filename), 'wt'):
+                    pass
+        # Directories are skipped even if they have tabular extensions
+        os.mkdir(os.path.join(directory, 'dir.csv'))
+        os.mkdir(os.path.join(directory, 'dir.csv.gz'))
+        os.mkdir(os.path.join(directory, 'dir'))
+
+    def find_tabular_files(self, directory):
+        return config.find_tabular_files(
+            directory,
+            self._tabular_extensions,
+            self._compression_extensions)
+
+    def test_find_tabular_files(self):
+        expected = sorted(
+            filename for (filename, is_tabular) in self._filenames
+            if is_tabular)
+        with tempfile.TemporaryDirectory() as directory:
+            self.make_directory(directory)
+            self.assertEqual(expected, self.find_tabular_files(directory))
+            # Without `os.scandir`
+            no_scandir_os = types.SimpleNamespace(
+                listdir=os.listdir, path=os.path)
+            with unittest.mock.patch.object(config, 'os', no_scandir_os):
+                self.assertEqual(
+                    expected, self.find_tabular_files(directory))
+
+    def test_list_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'x.csv'), 'wt'):
+                pass
+            os.mkdir(os.path.join(directory, 'dir.csv'))
+            expected = [('dir.csv', False), ('x.csv', True)]
+            self.assertEqual(expected, sorted(
+                (name, is_file()) for (name, is_file)
+                in config._list_directory(directory)))
+            no_scandir_os = types.SimpleNamespace(
+                listdir=os.listdir, path=os.path)
+            with unittest.mock.patch.object(config, 'os', no_scandir_os):
+                self.assertEqual(expected, sorted(
+                    (name, is_file()) for (name, is_file)
+                    in config._list_directory(directory)))
@@ -4,10 +4,16 @@
 # under the MIT License.  See `LICENSE.txt` for details.
 
 
+import os.path
+import sqlite3
 import string
+import tempfile
 import unittest
+import unittest.mock
 
 from .. import database
+from .. import records
+from ..engines import sqlite
 
 
 class IdentifierParseTest(unittest.TestCase):
@@ -117,3 +123,148 @@ class IdentifierParseTest(unittest.TestCase):
         for text, expected in IdentifierParseTest._quote_unquote:
             actual = database.unquote(text)
             self.assertEqual(expected, actual)
+
+
+class SqliteDbTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self._directory.name, 'test.sqlite')
+        self.db = self.make_db()
+
+    def tearDown(self):
+        self.db.close()
+        self._directory.cleanup()
+
+    def make_db(self, **kwargs):
+        return sqlite.SqliteDb(
+            self.filename,
+            db_cache_size=(2 ** 20),
+            db_mmap_size=0,
+            **kwargs)
+
+    def make_table(self, n_cols, name='t'):
+        header = records.Header(
+            *(('c{}'.format(idx), int) for idx in range(n_cols)))
+        table = self.db.make_table(name, header)
+        self.db.commit()
+        return table
+
+    def make_rows(self, n_rows, n_cols):
+        return [tuple(range(row_idx * n_cols, (row_idx + 1) * n_cols))
+                for row_idx in range(n_rows)]
+
+    def read_rows(self, name='t'):
+        # Read with a separate connection to see only committed rows
+        connection = sqlite3.connect(self.filename)
+        try:
+            return connection.execute(
+                'select * from {} order by rowid'.format(name)).fetchall()
+        finally:
+            connection.close()
+
+
+class InsertManyTest(SqliteDbTestCase):
+
+    def add_all_tracing_inserts(self, table, rows):
+        """Add the rows and return the number of records inserted by
+        each insert statement"""
+        batch_sizes = []
+        def trace(sql):
+            if sql.startswith('insert into'):
+                # One parenthesized tuple of values per record
+                values = sql.partition(' values ')[2]
+                batch_sizes.append(values.count('('))
+        self.db._connection.set_trace_callback(trace)
+        try:
+            n_rows = table.add_all(rows)
+        finally:
+            self.db._connection.set_trace_callback(None)
+        self.assertEqual(len(rows), n_rows)
+        return batch_sizes
+
+    def test_default_batch_size(self):
+        n_cols = 2
+        rows = self.make_rows(12345, n_cols)
+        table = self.make_table(n_cols)
+        batch_sizes = self.add_all_tracing_inserts(table, rows)
+        self.assertEqual([5000, 5000, 2345], batch_sizes)
+        self.assertEqual(rows, self.read_rows())
+
+    def test_short_last_batch(self):
+        self.db.close()
+        self.db = self.make_db(insert_batch_size=4)
+        n_cols = 3
+        rows = self.make_rows(10, n_cols)
+        table = self.make_table(n_cols)
+        batch_sizes = self.add_all_tracing_inserts(table, rows)
+        self.assertEqual([4, 4, 2], batch_sizes)
+        self.assertEqual(rows, self.read_rows())
+
+    @unittest.skipUnless(hasattr(sqlite3.Connection, 'setlimit'),
+                         'Cannot set the parameter limit of a connection')
+    def test_parameter_limit(self):
+        # Open a connection with the limit of older versions of SQLite
+        connect = sqlite3.connect
+        def connect_with_limit(*args, **kwargs):
+            connection = connect(*args, **kwargs)
+            connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+            return connection
+        self.db.close()
+        with unittest.mock.patch.object(
+                sqlite.sqlite3, 'connect', connect_with_limit):
+            self.db = self.make_db()
+        n_cols = 300
+        rows = self.make_rows(10, n_cols)
+        table = self.make_table(n_cols)
+        batch_sizes = self.add_all_tracing_inserts(table, rows)
+        # 999 // 300 = 3 records per statement
+        self.assertEqual([3, 3, 3, 1], batch_sizes)
+        self.assertEqual(rows, self.read_rows())
+
+    def test_empty(self):
+        table = self.make_table(2)
+        self.assertEqual([], self.add_all_tracing_inserts(table, []))
+        self.assertEqual([], self.read_rows())
+
+
+class TransactionTest(SqliteDbTestCase):
+
+    class _Failure(Exception):
+        pass
+
+    def failing_rows(self, rows, n_rows_before_failure):
+        for row in rows[:n_rows_before_failure]:
+            yield row
+        raise self._Failure()
+
+    def test_rollback_on_failure(self):
+        n_cols = 3
+        rows = self.make_rows(20, n_cols)
+        table = self.make_table(n_cols)
+        with self.assertRaises(self._Failure):
+            with self.db.transaction():
+                table.add_all(rows[:5])
+                table.add_all(self.failing_rows(rows[5:], 7))
+        self.assertEqual([], self.read_rows())
+        self.assertEqual(0, table.count_rows())
+        # The connection is still usable afterwards
+        self.assertEqual(20, table.add_all(rows))
+        self.assertEqual(rows, self.read_rows())
+        with self.db.transaction():
+            table.add_all(rows[:2])
+        self.assertEqual(rows + rows[:2], self.read_rows())
+
+    def test_nested_commit_is_deferred(self):
+        n_cols = 2
+        rows = self.make_rows(10, n_cols)
+        table = self.make_table(n_cols)
+        with self.db.transaction():
+            # `add_all` commits, but not inside a transaction
+            table.add_all(rows[:4])
+            self.db.commit()
+            self.assertEqual([], self.read_rows())
+            table.add_all(rows[4:])
+            self.assertEqual([], self.read_rows())
+            self.assertEqual(10, table.count_rows())
+        self.assertEqual(rows, self.read_rows())
@@ -0,0 +1,222 @@
+"""Tests datatypes.py"""
+
+# Copyright (c) 2018 Aubrey Barnard.  This is free software released
+# under the MIT License.  See `LICENSE.txt` for details.
+
+
+import datetime
+import unittest
+import unittest.mock
+
+from .. import datatypes
+
+
+def strptime(text, format):
+    """Parse with `datetime.strptime` in the same manner as
+    `parse_datetime`"""
+    try:
+        return datetime.datetime.strptime(text, format), None
+    except ValueError as e:
+        return None, e
+
+
+class ParseDatetimeCacheTest(unittest.TestCase):
+
+    _cases = (
+        ('2018-03-14', '%Y-%m-%d'),
+        ('09:26:53', '%H:%M:%S'),
+        ('2018-03-14T09:26:53', '%Y-%m-%dT%H:%M:%S'),
+        ('14/03/2018', '%d/%m/%Y'),
+        # Invalid
+        ('2018-02-30', '%Y-%m-%d'),
+        ('25:00:00', '%H:%M:%S'),
+        ('2018-03-14 09:26:53', '%Y-%m-%dT%H:%M:%S'),
+        ('', '%d/%m/%Y'),
+    )
+
+    def assert_same_result(self, expected, actual):
+        exp_dt, exp_err = expected
+        act_dt, act_err = actual
+        self.assertEqual(exp_dt, act_dt)
+        self.assertEqual(type(exp_err), type(act_err))
+        if exp_err is not None:
+            self.assertEqual(exp_err.args, act_err.args)
+
+    def test_cached_equals_uncached(self):
+        for text, format in self._cases:
+            with self.subTest(text=text, format=format):
+                expected = strptime(text, format)
+                # First call computes, second call hits the cache
+                first = datatypes.parse_datetime(text, format)
+                second = datatypes.parse_datetime(text, format)
+                self.assert_same_result(expected, first)
+                self.assert_same_result(expected, second)
+
+    def test_errors_not_cached(self):
+        _, err1 = datatypes.parse_datetime('2018-13-01', '%Y-%m-%d')
+        _, err2 = datatypes.parse_datetime('2018-13-01', '%Y-%m-%d')
+        self.assertIsInstance(err1, ValueError)
+        self.assertIsInstance(err2, ValueError)
+        self.assertIsNot(err1, err2)
+
+
+class FastIsoParserTest(unittest.TestCase):
+
+    _date_cases = (
+        # Valid
+        '2018-03-14',
+        '0001-01-01',
+        '9999-12-31',
+        '2016-02-29',
+        # Out of range
+        '2018-13-01',
+        '2018-00-10',
+        '2018-02-30',
+        '2017-02-29',
+        '2018-04-31',
+        '0000-01-01',
+        # Not padded
+        '2018-3-14',
+        '2018-03-4',
+        '18-03-14',
+        # Trailing garbage
+        '2018-03-14x',
+        '2018-03-14 ',
+        '2018-03-14\n',
+        '2018-03-14T00:00:00',
+        # Other
+        '',
+        ' 2018-03-14',
+        '2018/03/14',
+        '+018-03-14',
+        '2018-٠٣-14',
+    )
+
+    _time_cases = (
+        # Valid
+        '00:00:00',
+        '09:26:53',
+        '23:59:59',
+        '23:59:61',
+        # Out of range
+        '24:00:00',
+        '12:60:00',
+        '12:00:62',
+        # Not padded
+        '9:26:53',
+        '09:6:53',
+        '09:26:5',
+        # Trailing garbage
+        '09:26:53x',
+        '09:26:53 ',
+        '09:26:53.5',
+        # Other
+        '',
+        '09-26-53',
+        '-9:26:53',
+    )
+
+    _datetime_cases = (
+        # Valid
+        '2018-03-14T09:26:53',
+        '2016-02-29T23:59:59',
+        # Out of range
+        '2018-13-14T09:26:53',
+        '2018-02-30T09:26:53',
+        '2018-03-14T24:00:00',
+        '2018-03-14T09:60:53',
+        # Not padded
+        '2018-3-14T09:26:53',
+        '2018-03-14T9:26:53',
+        # Trailing garbage
+        '2018-03-14T09:26:53x',
+        '2018-03-14T09:26:53Z',
+        '2018-03-14T09:26:53\n',
+        # Other
+        '',
+        '2018-03-14',
+        '2018-03-14 09:26:53',
+        '2018-03-14t09:26:53',
+    )
+
+    def assert_same_as_strptime(self, parser, format, cases):
+        for text in cases:
+            with self.subTest(text=text):
+                exp_dt, exp_err = strptime(text, format)
+                # The fast parser agrees with `strptime` or defers to it
+                fast_dt = parser(text)
+                if exp_err is None:
+                    self.assertIn(fast_dt, (exp_dt, None))
+                else:
+                    self.assertIsNone(fast_dt)
+                # Values and errors match
+                act_dt, act_err = datatypes.parse_datetime(text, format)
+                self.assertEqual(exp_dt, act_dt)
+                self.assertEqual(type(exp_err), type(act_err))
+                if exp_err is not None:
+                    self.assertEqual(str(exp_err), str(act_err))
+
+    def test_date(self):
+        self.assert_same_as_strptime(
+            datatypes._parse_iso_date, '%Y-%m-%d', self._date_cases)
+
+    def test_time(self):
+        self.assert_same_as_strptime(
+            datatypes._parse_iso_time, '%H:%M:%S', self._time_cases)
+
+    def test_datetime(self):
+        self.assert_same_as_strptime(
+            datatypes._parse_iso_datetime, '%Y-%m-%dT%H:%M:%S',
+            self._datetime_cases)
+
+    def test_fast_parsers_used_for_padded_valid_input(self):
+        self.assertEqual(datetime.datetime(2018, 3, 14),
+                         datatypes._parse_iso_date('2018-03-14'))
+        self.assertEqual(datetime.datetime(1900, 1, 1, 9, 26, 53),
+                         datatypes._parse_iso_time('09:26:53'))
+        self.assertEqual(datetime.datetime(2018, 3, 14, 9, 26, 53),
+                         datatypes._parse_iso_datetime('2018-03-14T09:26:53'))
+
+
+class ParseTest(unittest.TestCase):
+
+    def test_plain_names(self):
+        for name, datatype in datatypes.names2datatypes.items():
+            with self.subTest(name=name):
+                self.assertEqual((datatype, None), datatypes.parse(name))
+
+    def test_unhashable(self):
+        # Non-strings are left to the parser to reject rather than
+        # failing the lookup of plain names
+        err = ValueError('not a predicate')
+        with unittest.mock.patch.object(
+                datatypes.barnapy.parse, 'predicate_err',
+                return_value=(None, err)) as predicate_err:
+            self.assertEqual((None, err), datatypes.parse(['int']))
+        predicate_err.assert_called_once_with(['int'])
+
+
+class DeriveTest(unittest.TestCase):
+
+    def test_derive(self):
+        date = datatypes.Date.derive(['%d/%m/%Y'])
+        self.assertEqual(
+            (datetime.date(2018, 3, 14), None), date.parse('14/03/2018'))
+        self.assertEqual('14/03/2018', date.format(datetime.date(2018, 3, 14)))
+
+    def test_too_many_args(self):
+        with self.assertRaises(datatypes.DataTypeError):
+            datatypes.Date.derive(['%d/%m/%Y', '%Y'])
+        with self.assertRaises(datatypes.DataTypeError):
+            datatypes.Int.derive(['10'])
+
+    def test_parse_too_many_args(self):
+        datatype, err = datatypes.parse('int(10)')
+        self.assertIsNone(datatype)
+        self.assertIsInstance(err, datatypes.DataTypeError)
+        datatype, err = datatypes.parse('date(%Y, %m)')
+        self.assertIsNone(datatype)
+        self.assertIsInstance(err, datatypes.DataTypeError)
+        self.assertEqual(
+            (datatypes.Date.derive(['%Y']), None),
+            datatypes.parse('date(%Y)'))
@@ -0,0 +1,140 @@
+"""Tests file.py"""
+
+# Copyright (c) 2018 Aubrey Barnard.  This is free software released
+# under the MIT License.  See `LICENSE.txt` for details.
+
+
+import bz2
+import gzip
+import lzma
+import os.path
+import sys
+import tempfile
+import unittest
+import unittest.mock
+
+from .. import file
+
+
+# Decompression commands that are known to exist because they run the
+# current Python.  Each takes the filename as its last argument.
+def _python_command(script):
+    return (sys.executable, '-c', script)
+
+_python_decompressor_commands = {
+    compression: (_python_command(
+        'import {0}, shutil, sys\n'
+        'with {0}.open(sys.argv[-1], "rb") as file:\n'
+        '    shutil.copyfileobj(file, sys.stdout.buffer)\n'
+        .format(module)),)
+    for (compression, module) in (
+        ('gzip', 'gzip'), ('bzip2', 'bz2'), ('lzma', 'lzma'))
+}
+
+_endless_command = _python_command(
+    'import sys\n'
+    'while True:\n'
+    '    sys.stdout.write("line\\n")\n')
+
+_failing_command = _python_command(
+    'import sys\n'
+    'sys.stdout.write("line\\n")\n'
+    'sys.exit(3)\n')
+
+
+class DecompressorOutputTest(unittest.TestCase):
+
+    _lines = ['id,x\n'] + ['{},{}\n'.format(i, i * i) for i in range(10000)]
+
+    _openers = (
+        ('gz', gzip.open),
+        ('bz2', bz2.open),
+        ('xz', lzma.open),
+    )
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def write_file(self, name, open_):
+        filename = os.path.join(self.directory, name)
+        with open_(filename, 'wt') as out_file:
+            out_file.writelines(self._lines)
+        return filename
+
+    def patch_commands(self, commands):
+        return unittest.mock.patch.dict(
+            file._decompressor_commands, commands)
+
+    def test_read_all(self):
+        with self.patch_commands(_python_decompressor_commands):
+            for extension, open_ in self._openers:
+                with self.subTest(extension=extension):
+                    # The name starts with a hyphen to check that it is
+                    # not taken as an option
+                    filename = self.write_file(
+                        '-x.csv.' + extension, open_)
+                    with open_(filename, 'rt') as in_file:
+                        expected = list(in_file)
+                    self.assertEqual(self._lines, expected)
+                    with file.open(filename) as lines:
+                        self.assertIsInstance(
+                            lines, file._DecompressorOutput)
+                        self.assertEqual(expected, list(lines))
+                    self.assertEqual(0, lines._process.returncode)
+                    self.assertEqual(
+                        ('--', filename), tuple(lines._process.args[-2:]))
+                    self.assertEqual(
+                        expected, list(file.read_lines(filename)))
+
+    def test_close_early(self):
+        filename = self.write_file('x.csv.gz', gzip.open)
+        commands = {'gzip': (_endless_command,)}
+        with self.patch_commands(commands):
+            lines = file.open(filename)
+        self.assertEqual('line\n', next(lines))
+        # Closing stops and waits for the process without an error
+        lines.close()
+        self.assertTrue(lines.closed)
+        self.assertIsNotNone(lines._process.returncode)
+        self.assertNotEqual(0, lines._process.returncode)
+        # Closing again does nothing
+        lines.close()
+
+    def test_failure(self):
+        filename = self.write_file('x.csv.gz', gzip.open)
+        commands = {'gzip': (_failing_command,)}
+        with self.patch_commands(commands):
+            lines = file.open(filename)
+        self.assertEqual(['line\n'], list(lines))
+        with self.assertRaises(OSError):
+            lines.close()
+        self.assertEqual(3, lines._process.returncode)
+
+    def test_fallback(self):
+        commands = {
+            compression: (('fitamord-no-such-decompressor', '-dc'),)
+            for compression in _python_decompressor_commands}
+        with self.patch_commands(commands):
+            for extension, open_ in self._openers:
+                with self.subTest(extension=extension):
+                    filename = self.write_file(
+                        'x.csv.' + extension, open_)
+                    with file.open(filename) as lines:
+                        self.assertNotIsInstance(
+                            lines, file._DecompressorOutput)
+                        self.assertEqual(self._lines, list(lines))
+
+    def test_not_for_writing_or_missing_files(self):
+        with self.patch_commands(_python_decompressor_commands):
+            filename = os.path.join(self.directory, 'x.csv.gz')
+            self.assertIsNone(file._open_decompressor_output(
+                'gzip', filename, 'rt'))
+            self.write_file('x.csv.gz', gzip.open)
+            self.assertIsNone(file._open_decompressor_output(
+                'gzip', filename, 'rb'))
+            self.assertIsNone(file._open_decompressor_output(
+                'gzip', filename, 'wt'))
@@ -0,0 +1,101 @@
+"""Tests __main__.py"""
+
+# Copyright (c) 2018 Aubrey Barnard.  This is free software released
+# under the MIT License.  See `LICENSE.txt` for details.
+
+
+import gzip
+import io
+import os.path
+import sys
+import tempfile
+import unittest
+
+from .. import __main__ as main
+
+
+class OutputTest(unittest.TestCase):
+
+    _feature_vectors = (
+        (1, {1: 1, 2: 1, 5: 1}),
+        (0, {4: 172, 3: True, 1: 5}),
+        (1, {}),
+        (0, {7: 0.25, 2: 'x'}),
+        )
+
+    _expected_text = (
+        '1 1:1 2:1 5:1\n'
+        '0 1:5 3:True 4:172\n'
+        '1\n'
+        '0 2:x 7:0.25\n'
+        )
+
+    def write_feature_vectors(self, filename=None):
+        with main.open_output(filename) as output:
+            for label, feature_vector in self._feature_vectors:
+                main.print_as_svmlight(label, feature_vector, output)
+
+    def write_to_stdout(self, stdout):
+        orig_stdout = sys.stdout
+        sys.stdout = stdout
+        try:
+            print('before', file=stdout)
+            self.write_feature_vectors()
+            print('after', file=stdout)
+        finally:
+            sys.stdout = orig_stdout
+
+    def test_stdout_with_buffer(self):
+        binary = io.BytesIO()
+        stdout = io.TextIOWrapper(binary, encoding='utf-8')
+        self.write_to_stdout(stdout)
+        # Standard output must still be open and usable
+        self.assertFalse(stdout.closed)
+        stdout.flush()
+        self.assertEqual(
+            'before\n' + self._expected_text + 'after\n',
+            binary.getvalue().decode('utf-8'))
+
+    def test_stdout_without_buffer(self):
+        stdout = io.StringIO()
+        self.write_to_stdout(stdout)
+        self.assertFalse(stdout.closed)
+        self.assertEqual(
+            'before\n' + self._expected_text + 'after\n',
+            stdout.getvalue())
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'tmp.svm')
+            self.write_feature_vectors(filename)
+            with open(filename, 'rt') as file:
+                self.assertEqual(self._expected_text, file.read())
+
+    def test_gzip_file(self):
+        stdout = io.StringIO()
+        self.write_to_stdout(stdout)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'tmp.gz')
+            self.write_feature_vectors(filename)
+            with gzip.open(filename, 'rt') as file:
+                text = file.read()
+        self.assertEqual(self._expected_text, text)
+        # Same as what is written to standard output
+        self.assertEqual(
+            'before\n' + text + 'after\n', stdout.getvalue())
+
+
+class ParseArgsTest(unittest.TestCase):
+
+    def test_defaults(self):
+        args = main.parse_args([])
+        self.assertEqual('.', args.directory)
+        self.assertIsNone(args.output)
+
+    def test_directory_and_output(self):
+        args = main.parse_args(['data', '--output', 'fvs.svm.gz'])
+        self.assertEqual('data', args.directory)
+        self.assertEqual('fvs.svm.gz', args.output)
+        args = main.parse_args(['-o', 'fvs.svm'])
+        self.assertEqual('.', args.directory)
+        self.assertEqual('fvs.svm', args.output)